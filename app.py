@@ -1,56 +1,102 @@
 
 
 import os
+import time
+import uuid
 from flask import Flask, request, jsonify, send_file
-from translate import Translator 
-from gtts import gTTS
+from werkzeug.utils import secure_filename
+
+from image_dedup import PerceptualHashIndex
+from ocr_pipeline import TARGET_LANGUAGE, analyze_batch, analyze_image as run_pipeline
 
 app = Flask(__name__)
-TARGET_LANGUAGE = 'en'
-OUTPUT_AUDIO_FILE = 'translation_output.mp3'
 TEMP_UPLOAD_FOLDER = 'temp_uploads'
+MAX_BATCH_IMAGES = 50
+MAX_CACHED_RESULTS = 500  # Also the number of generated MP3s kept on disk
+# Reusing a result across requests is riskier than merging photos within one
+# batch (the hashes mostly capture layout), so require a much closer match;
+# the index also confirms every match on a content thumbnail
+CROSS_REQUEST_THRESHOLD = 4
+# Uploads and audio older than this are treated as left over from an earlier run
+STALE_UPLOAD_SECONDS = 24 * 60 * 60
 os.makedirs(TEMP_UPLOAD_FOLDER, exist_ok=True)
-def translate_and_speak(ocr_text: str, target_lang: str) -> dict:
+
+
+def remove_audio(result: dict) -> None:
+    """Deletes the MP3 of a result dropped from the index; nothing else refers to it."""
+    audio_path = result.get("audio_file_path")
+    if audio_path and os.path.exists(audio_path):
+        os.remove(audio_path)
+
+
+def clear_stale_uploads(max_age: float = STALE_UPLOAD_SECONDS) -> None:
     """
-    Translates text and generates a local MP3 file.
+    Removes uploads and audio left over from earlier runs. Only old files are
+    deleted: other server processes (or this one, reloaded) may still be
+    using recent uploads and serving recent audio.
     """
-    if not ocr_text.strip():
-        return {
-            "success": False,
-            "translated_text": "",
-            "message": "OCR text is empty for translation.",
-        }
+    cutoff = time.time() - max_age
+    for name in os.listdir(TEMP_UPLOAD_FOLDER):
+        path = os.path.join(TEMP_UPLOAD_FOLDER, name)
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            # Removed by another process in the meantime
+            pass
 
-    try:
-        translator = Translator(to_lang=target_lang)
-        translated_text = translator.translate(ocr_text)
 
-        source_lang = "auto" 
-        tts = gTTS(text=translated_text, lang=target_lang)
-        audio_path = os.path.join(TEMP_UPLOAD_FOLDER, OUTPUT_AUDIO_FILE)
-        tts.save(audio_path)
+clear_stale_uploads()
+# Near-duplicate uploads (same sign from another angle, rescans) reuse earlier
+# results. Every generated MP3 belongs to an index entry and is deleted when
+# that entry is evicted, so disk use stays bounded.
+RESULT_INDEX = PerceptualHashIndex(
+    threshold=CROSS_REQUEST_THRESHOLD, max_entries=MAX_CACHED_RESULTS, on_evict=remove_audio
+)
 
-        return {
-            "success": True,
-            "translated_text": translated_text,
-            "source_language": source_lang,
-            "audio_file_path": audio_path
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "translated_text": "",
-            "message": f"Translation/TTS failed: {e}",
-        }
-def perform_ocr(image_file_path: str) -> str:
+
+def client_scope() -> str:
     """
-    Placeholder function for Tesseract/OpenCV integration.
-    In the final app, this would use a library like 'pytesseract'.
+    Identifies the caller for the result cache, so cached text and audio are
+    only reused for the client that produced them.
     """
-    print(f"--- Simulating OCR on image: {image_file_path} ---")
-    return "Das ist ein Beispieltext, der von einer deutschen Seite gescannt wurde, und er wird jetzt übersetzt."
+    return request.headers.get('X-Client-Id') or request.remote_addr
+
+
+def form_flag(name: str) -> bool:
+    """Reads a true/false form field; anything but 1/true/yes counts as false."""
+    return request.form.get(name, 'false').lower() in ('1', 'true', 'yes')
 
 
+def save_upload(file) -> tuple:
+    """
+    Saves an uploaded image under a unique name so concurrent requests never
+    overwrite each other, and picks a matching audio file name.
+    """
+    request_id = uuid.uuid4().hex
+    image_path = os.path.join(TEMP_UPLOAD_FOLDER, f"{request_id}_{secure_filename(file.filename)}")
+    file.save(image_path)
+    audio_name = f"{request_id}.mp3"
+    return image_path, audio_name
+
+
+def build_response(results: dict) -> dict:
+    """
+    Shapes a pipeline result into the JSON returned to the Flutter app.
+    Reused (near-duplicate) results point at the audio of the original image.
+    """
+    if not results["success"]:
+        return {
+            "original_text": results.get("original_text", ""),
+            "message": results["message"],
+        }
+    return {
+        "original_text": results["original_text"],
+        "translated_text": results["translated_text"],
+        "audio_url": request.url_root + 'get_audio/' + os.path.basename(results["audio_file_path"]),
+        "duplicate": results.get("duplicate", False),
+    }
+
 
 @app.route('/analyze_image', methods=['POST'])
 def analyze_image():
@@ -63,43 +109,90 @@ def analyze_image():
     file = request.files['image']
     if file.filename == '':
         return jsonify({"message": "No selected image file"}), 400
-    image_path = os.path.join(TEMP_UPLOAD_FOLDER, file.filename)
-    file.save(image_path)
+    target_lang = request.form.get('target_lang', TARGET_LANGUAGE)
+    image_path, audio_name = save_upload(file)
     try:
-        extracted_text = perform_ocr(image_path)
-    except Exception as e:
-        return jsonify({"message": f"OCR processing failed: {e}"}), 500
-    
-    results = translate_and_speak(extracted_text, target_lang=TARGET_LANGUAGE)
+        results = run_pipeline(
+            image_path,
+            target_lang=target_lang,
+            audio_path=os.path.join(TEMP_UPLOAD_FOLDER, audio_name),
+            index=RESULT_INDEX,
+            cache_scope=client_scope(),
+        )
+    finally:
+        os.remove(image_path)
 
     if results["success"]:
-        return jsonify({
-            "original_text": extracted_text,
-            "translated_text": results["translated_text"],
-            "audio_url": request.url_root + 'get_audio'
-        })
+        return jsonify(build_response(results))
     else:
-
-        os.remove(image_path)
         return jsonify({"message": results["message"]}), 500
 
-@app.route('/get_audio', methods=['GET'])
-def get_audio():
+
+@app.route('/analyze_batch', methods=['POST'])
+def analyze_batch_images():
     """
-    Endpoint for the Flutter app to download the generated MP3 file.
+    Endpoint for sending many images (e.g. every page of a document) in one
+    multipart request. Images are processed concurrently and a result is
+    returned per image, in upload order. Send dedup=true to OCR only one
+    image of each group of near-duplicates (e.g. several photos of the same
+    sign), and sharpest_only=true to pick the sharpest one.
     """
-    audio_path = os.path.join(TEMP_UPLOAD_FOLDER, OUTPUT_AUDIO_FILE)
+    files = [f for f in request.files.getlist('images') if f.filename != '']
+    if not files:
+        return jsonify({"message": "No image files in 'images' part"}), 400
+    if len(files) > MAX_BATCH_IMAGES:
+        return jsonify({"message": f"Too many images, the limit is {MAX_BATCH_IMAGES}"}), 400
+
+    target_lang = request.form.get('target_lang', TARGET_LANGUAGE)
+    dedup = form_flag('dedup')
+    sharpest_only = form_flag('sharpest_only')
+    uploads = [save_upload(file) for file in files]
+    jobs = [
+        (image_path, os.path.join(TEMP_UPLOAD_FOLDER, audio_name))
+        for image_path, audio_name in uploads
+    ]
+    try:
+        batch_results = analyze_batch(
+            jobs, target_lang=target_lang, index=RESULT_INDEX, cache_scope=client_scope(),
+            dedup=dedup, sharpest_only=sharpest_only,
+        )
+    finally:
+        for image_path, _ in uploads:
+            os.remove(image_path)
+
+    results = []
+    for file, result in zip(files, batch_results):
+        entry = build_response(result)
+        entry["filename"] = file.filename
+        entry["success"] = result["success"]
+        results.append(entry)
+
+    return jsonify({
+        "results": results,
+        "succeeded": sum(1 for r in results if r["success"]),
+        "failed": sum(1 for r in results if not r["success"]),
+    })
+
+
+@app.route('/get_audio/<audio_name>', methods=['GET'])
+def get_audio(audio_name):
+    """
+    Endpoint for the Flutter app to download a generated MP3 file, using the
+    audio_url returned by /analyze_image or /analyze_batch.
+    """
+    audio_name = secure_filename(audio_name)
+    audio_path = os.path.join(TEMP_UPLOAD_FOLDER, audio_name)
     if not os.path.exists(audio_path):
         return jsonify({"message": "Audio file not found"}), 404
-        
+
     return send_file(
         audio_path,
         mimetype='audio/mp3',
         as_attachment=True,
-        download_name=OUTPUT_AUDIO_FILE
+        download_name=audio_name
     )
 if __name__ == '__main__':
     print("-----------------------------------------------------------------------")
-    print("FLASK SERVER READY: The server will run the translation/TTS logic.")
+    print("FLASK SERVER READY: The server will run the OCR/translation/TTS logic.")
     print("-----------------------------------------------------------------------")
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,280 @@
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+FILE_TIMEOUT = 120  # Seconds one file may take before its worker is killed
+MAX_RETRIES = 2  # Extra attempts after a failure or timeout
+RECYCLE_AFTER = 200  # Restart a worker after this many files to cap leaked memory
+STOP_POLL_INTERVAL = 0.5  # How often a waiting job checks whether the run was interrupted
+# Failures that will not change on a retry (e.g. an unreadable image)
+PERMANENT_ERRORS = (ValueError, FileNotFoundError)
+JOURNAL_NAME = '.ocr_journal.jsonl'
+REPORT_NAME = 'ocr_batch_report.json'
+
+
+def _worker_loop(func, tasks, messages):
+    """Runs in the worker process: executes jobs and reports each stage it enters."""
+    # The parent decides when to stop; Ctrl-C must not kill workers mid-job
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(os, 'setsid'):
+        # Own process group, so the parent can kill Tesseract children with the worker
+        os.setsid()
+    while True:
+        job = tasks.get()
+        if job is None:
+            return
+
+        def report_stage(name):
+            messages.send(('stage', name))
+
+        try:
+            messages.send(('done', func(job, report_stage)))
+        except PERMANENT_ERRORS as e:
+            messages.send(('invalid', f"{type(e).__name__}: {e}"))
+        except Exception as e:
+            messages.send(('error', f"{type(e).__name__}: {e}"))
+
+
+def _kill_process_tree(process):
+    """Kills a worker together with any processes it started (e.g. tesseract)."""
+    if os.name == 'posix':
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    elif process.is_alive():
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)], capture_output=True)
+    if process.is_alive():
+        # The worker had not reached setsid() yet
+        process.kill()
+    process.join()
+
+
+class Worker:
+    """
+    A single worker process that can be killed and replaced.
+
+    `func(job, report_stage)` must be a top-level (picklable) function. It
+    calls `report_stage(name)` before each step so a timeout or crash can be
+    attributed to the step that was running.
+    """
+
+    def __init__(self, func, recycle_after=RECYCLE_AFTER):
+        self.func = func
+        self.recycle_after = recycle_after
+        self._start()
+
+    def _start(self):
+        self.tasks = multiprocessing.Queue()
+        # A pipe rather than a queue: sends are unbuffered, so the last stage
+        # reported before a crash still reaches the parent
+        self.messages, child_end = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.Process(
+            target=_worker_loop, args=(self.func, self.tasks, child_end), daemon=True
+        )
+        self.process.start()
+        child_end.close()
+        self.completed = 0
+
+    def kill(self):
+        _kill_process_tree(self.process)
+        self.messages.close()
+
+    def restart(self):
+        self.kill()
+        self._start()
+
+    def close(self):
+        if self.process.is_alive():
+            self.tasks.put(None)
+            self.process.join(timeout=5)
+        self.kill()
+
+    def run(self, job, timeout=FILE_TIMEOUT, stop=None):
+        """
+        Runs one job and returns (status, stage, payload).
+
+        status is 'ok' (payload is the result), 'error' (worth retrying),
+        'invalid' (a PERMANENT_ERRORS failure), 'timeout', 'crashed' or
+        'interrupted' (`stop` was set). Otherwise payload is a message. The
+        worker is replaced after a timeout or crash so the next job starts
+        from a clean process.
+        """
+        if self.completed >= self.recycle_after:
+            self.restart()
+        self.tasks.put(job)
+        stage = 'queued'
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.restart()
+                return 'timeout', stage, f"Timed out after {timeout}s"
+            if stop is not None and stop.is_set():
+                self.restart()
+                return 'interrupted', stage, "Run interrupted"
+            if not self.messages.poll(min(remaining, STOP_POLL_INTERVAL)):
+                continue
+            try:
+                kind, payload = self.messages.recv()
+            except EOFError:
+                # The worker died mid-job (e.g. a segfault in a native library)
+                self.process.join()
+                exit_code = self.process.exitcode
+                self.restart()
+                return 'crashed', stage, f"Worker exited with code {exit_code}"
+            if kind == 'stage':
+                stage = payload
+                continue
+            self.completed += 1
+            return ('ok' if kind == 'done' else kind), stage, payload
+
+
+def file_key(path):
+    """Identifies a file by name, size and mtime, so edited files are processed again."""
+    stat = os.stat(path)
+    return f"{os.path.basename(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+class Journal:
+    """
+    Append-only JSON-lines checkpoint of finished files.
+
+    Every entry is flushed and fsync'd as soon as a file finishes, so an
+    interrupted run can be restarted and will skip everything already
+    recorded. A partially written last line (from a crash) is cut off on
+    load, so new entries start on a line of their own.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'rb+') as f:
+                data = f.read()
+                if data and not data.endswith(b'\n'):
+                    f.truncate(data.rfind(b'\n') + 1)
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.entries[entry['key']] = entry
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def record(self, entry):
+        with self._lock:
+            self.entries[entry['key']] = entry
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def run_batch(jobs, func, journal, timeout=FILE_TIMEOUT, retries=MAX_RETRIES,
+              workers=1, on_result=None):
+    """
+    Runs `func` over `jobs` in recyclable worker processes.
+
+    `jobs` is a list of dicts with 'key', 'file' and 'job' (the argument
+    passed to `func`). Jobs already in the journal are skipped. Errors,
+    timeouts and crashes are retried up to `retries` times; permanent
+    errors are not. Each job's final outcome is written to the journal and
+    passed to `on_result(entry)`, which is called from one thread at a time.
+
+    On KeyboardInterrupt, queued jobs are cancelled, running ones are killed
+    without being journaled (so a resumed run redoes them) and the
+    interrupt is re-raised.
+    """
+    pending = [job for job in jobs if job['key'] not in journal]
+    if not pending:
+        return
+    pool = queue.Queue()
+    for _ in range(min(workers, len(pending))):
+        pool.put(Worker(func))
+    callback_lock = threading.Lock()
+    stop = threading.Event()
+
+    def process(job):
+        worker = pool.get()
+        try:
+            attempts = []
+            for _ in range(retries + 1):
+                started = time.monotonic()
+                status, stage, payload = worker.run(job['job'], timeout, stop)
+                attempts.append(round(time.monotonic() - started, 2))
+                if status in ('ok', 'invalid', 'interrupted'):
+                    break
+        finally:
+            pool.put(worker)
+        if status == 'interrupted':
+            return
+
+        entry = {
+            'key': job['key'],
+            'file': job['file'],
+            'status': 'ok' if status == 'ok' else 'failed',
+            'stage': stage,
+            'duration': round(sum(attempts), 2),
+            'attempts': len(attempts),
+        }
+        if status == 'ok':
+            entry['result'] = payload
+        else:
+            entry['error'] = f"{status}: {payload}"
+        journal.record(entry)
+        if on_result is not None:
+            with callback_lock:
+                on_result(entry)
+
+    executor = ThreadPoolExecutor(max_workers=pool.qsize())
+    try:
+        futures = [executor.submit(process, job) for job in pending]
+        for future in futures:
+            future.result()
+    except BaseException:
+        # Ctrl-C (or a failing callback): stop running jobs instead of finishing the batch
+        stop.set()
+        raise
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        while not pool.empty():
+            pool.get().close()
+
+
+def write_report(journal, keys, report_path, elapsed):
+    """Writes and prints a summary of the run, listing failures with stage and duration."""
+    entries = [journal.entries[key] for key in keys if key in journal]
+    failures = [
+        {name: entry.get(name) for name in ('file', 'stage', 'duration', 'attempts', 'error', 'duplicate_of')}
+        for entry in entries if entry['status'] == 'failed'
+    ]
+    report = {
+        'total': len(keys),
+        'succeeded': sum(1 for entry in entries if entry['status'] != 'failed'),
+        'failed': len(failures),
+        'not_processed': len(keys) - len(entries),
+        'elapsed_seconds': round(elapsed, 2),
+        'failures': failures,
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("\n--- Batch Summary ---")
+    print(f"Total: {report['total']}  Succeeded: {report['succeeded']}  "
+          f"Failed: {report['failed']}  Elapsed: {report['elapsed_seconds']}s")
+    for failure in failures:
+        print(f" -> {failure['file']}: {failure['error']} (stage: {failure['stage']}, "
+              f"{failure['duration']}s over {failure['attempts']} attempts)")
+    print(f"Report written to {report_path}")
+    return report
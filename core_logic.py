@@ -1,6 +1,4 @@
-from gtts import gTTS
-from translate import Translator
-import os
+from ocr_pipeline import synthesize_speech, translate_text
 import io
 import base64
 
@@ -9,16 +7,12 @@ def translate_and_encode(text_to_translate, source_lang='en', target_lang='es'):
     Translates text, generates audio, and encodes the audio to Base64.
     """
     try:
-        # 1. Translation using the 'translate' library
-        translator = Translator(from_lang=source_lang, to_lang=target_lang)
-        translated_text = translator.translate(text_to_translate)
+        # 1. Translation (shared with the Flask pipeline)
+        translated_text, _ = translate_text(text_to_translate, target_lang, source_lang=source_lang)
         
-        # 2. Voice Generation (gTTS) and Base64 Encoding
-        tts = gTTS(text=translated_text, lang=target_lang)
-        
-        # Use an in-memory file (BytesIO)
+        # 2. Voice Generation (gTTS) into an in-memory file (BytesIO)
         mp3_fp = io.BytesIO()
-        tts.write_to_fp(mp3_fp)
+        synthesize_speech(translated_text, target_lang, mp3_fp)
         mp3_fp.seek(0)
         
         # Encode audio bytes to Base64 string
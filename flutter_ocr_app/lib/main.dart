@@ -123,9 +123,7 @@ class _OcrTranslatorScreenState extends State<OcrTranslatorScreen> {
   // -----------------------
   Future<void> _playAudio() async {
     if (_audioUrl != null && _audioUrl!.isNotEmpty) {
-      // Note: The player expects a full URL, which is constructed from audioBaseUrl + relative path
-      String fullAudioUrl = '$audioBaseUrl/get_audio'; // Since the server always returns the audio from /get_audio
-      await _audioPlayer.play(UrlSource(fullAudioUrl));
+      await _audioPlayer.play(UrlSource(_audioUrl!));
     } else {
       _showError('No audio file is available to play.');
     }
@@ -0,0 +1,236 @@
+import threading
+
+import cv2
+import numpy as np
+
+HASH_SIZE = 8  # 8x8 -> 64-bit hashes
+DEFAULT_THRESHOLD = 10  # Max Hamming distance (out of 64 bits) to count as a near-duplicate
+SHARPNESS_SIZE = 512  # Longest side used when scoring sharpness, so scores compare across resolutions
+MAX_INDEX_ENTRIES = 10_000
+CONTENT_SIZE = 128  # Side of the thumbnail compared pixel by pixel to confirm a hash match
+CONTENT_GRID = 16  # Compared per block, so one changed line of text is not averaged away
+CONTENT_THRESHOLD = 0.8  # Max RMS difference of any block, in standard deviations of the image
+
+
+def load_thumbnail(image_path):
+    """Decodes an image as grayscale at 1/4 resolution; plenty for hashing and sharpness."""
+    gray = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if gray is None:
+        raise ValueError(f"Cannot read image file: {image_path}")
+    return gray
+
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II basis, so pHash needs nothing beyond NumPy."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+def dhash(gray, hash_size=HASH_SIZE):
+    """Difference hash: compares horizontally adjacent pixels of a tiny thumbnail."""
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return np.packbits(bits.flatten())
+
+
+def phash(gray, hash_size=HASH_SIZE, highfreq_factor=4):
+    """Perceptual hash: low-frequency DCT coefficients compared to their median."""
+    size = hash_size * highfreq_factor
+    small = cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA).astype(np.float64)
+    dct = _dct_matrix(size)
+    coefficients = dct @ small @ dct.T
+    low = coefficients[:hash_size, :hash_size].flatten()
+    # Skip the DC term when taking the median; it only reflects overall brightness
+    bits = low > np.median(low[1:])
+    return np.packbits(bits)
+
+
+def image_hash(gray, hash_size=HASH_SIZE):
+    """Concatenated dHash + pHash bytes for one grayscale image."""
+    return np.concatenate([dhash(gray, hash_size), phash(gray, hash_size)])
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two packed hashes."""
+    return int(np.unpackbits(np.bitwise_xor(a, b)).sum())
+
+
+def sharpness(gray):
+    """Variance of the Laplacian on a fixed-size thumbnail; higher is sharper."""
+    scale = SHARPNESS_SIZE / max(gray.shape[:2])
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def content_thumbnail(gray, size=CONTENT_SIZE):
+    """Fixed-size thumbnail kept next to a hash so a match can be confirmed on content."""
+    return cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA)
+
+
+def _normalized(thumbnail):
+    """Lightly blurred (against noise and small shifts), zero mean, unit variance."""
+    blurred = cv2.GaussianBlur(thumbnail.astype(np.float32), (0, 0), 1.0)
+    return (blurred - blurred.mean()) / (blurred.std() + 1e-6)
+
+
+def content_distance(a, b, grid=CONTENT_GRID):
+    """
+    Largest per-block RMS difference between two content thumbnails once
+    brightness and contrast are normalised. Rescans of a page stay low;
+    pages from the same template with different text differ strongly in
+    the blocks holding that text.
+    """
+    squared = (_normalized(a) - _normalized(b)) ** 2
+    block = squared.shape[0] // grid
+    squared = squared[:block * grid, :block * grid]
+    blocks = squared.reshape(grid, block, grid, block).mean(axis=(1, 3))
+    return float(np.sqrt(blocks.max()))
+
+
+def same_content(a, b, threshold=CONTENT_THRESHOLD):
+    """True when two content thumbnails show the same page, not just the same layout."""
+    return content_distance(a, b) <= threshold
+
+
+class PerceptualHashIndex:
+    """
+    Thread-safe store of (hash, result) pairs that looks up near-duplicates.
+
+    A candidate matches when both its dHash and its pHash are within
+    `threshold` bits of a stored entry. Both hashes come from tiny
+    thumbnails and mostly capture layout, so documents from the same
+    template match each other; pass content thumbnails to `add` and `find`
+    to confirm every hash match with `same_content` before it is reused.
+    Changes too small to show in a thumbnail (e.g. a single number) can
+    still slip through, so scope entries with `key` as well. The oldest
+    entries are evicted past `max_entries`, and `on_evict(result)` is
+    called for each so files they reference can be cleaned up.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, hash_size=HASH_SIZE, max_entries=MAX_INDEX_ENTRIES,
+                 on_evict=None):
+        self.threshold = threshold
+        self.hash_size = hash_size
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self._half = hash_size * hash_size // 8
+        self._hashes = np.empty((0, 2 * self._half), dtype=np.uint8)
+        self._keys = []
+        self._thumbnails = []
+        self._results = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._results)
+
+    def compute_hash(self, gray):
+        return image_hash(gray, self.hash_size)
+
+    def _distances(self, hashes, value):
+        bits = np.unpackbits(np.bitwise_xor(hashes, value), axis=1)
+        split = self._half * 8
+        return bits[:, :split].sum(axis=1), bits[:, split:].sum(axis=1)
+
+    def find(self, value, key=None, thumbnail=None):
+        """
+        Returns the stored result closest to `value`, or None.
+
+        When `key` is given only entries added with the same key match
+        (e.g. the target language of a cached translation). When
+        `thumbnail` is given, only entries whose stored thumbnail shows the
+        same content match.
+        """
+        with self._lock:
+            if not self._results:
+                return None
+            d_dist, p_dist = self._distances(self._hashes, value)
+            matches = (d_dist <= self.threshold) & (p_dist <= self.threshold)
+            if key is not None:
+                matches &= np.array([k == key for k in self._keys])
+            total = (d_dist + p_dist).astype(np.int64)
+            for i in np.argsort(total, kind='stable'):
+                if not matches[i]:
+                    continue
+                if thumbnail is not None and (
+                        self._thumbnails[i] is None or not same_content(thumbnail, self._thumbnails[i])):
+                    continue
+                return self._results[int(i)]
+            return None
+
+    def add(self, value, result, key=None, thumbnail=None):
+        evicted = []
+        with self._lock:
+            self._hashes = np.vstack([self._hashes, value[None, :]])
+            self._keys.append(key)
+            self._thumbnails.append(thumbnail)
+            self._results.append(result)
+            overflow = len(self._results) - self.max_entries
+            if overflow > 0:
+                evicted = self._results[:overflow]
+                self._hashes = self._hashes[overflow:]
+                del self._keys[:overflow]
+                del self._thumbnails[:overflow]
+                del self._results[:overflow]
+        if self.on_evict is not None:
+            for old in evicted:
+                self.on_evict(old)
+
+
+def cluster_by_hash(hashes, threshold=DEFAULT_THRESHOLD, hash_size=HASH_SIZE, thumbnails=None):
+    """
+    Greedily groups items whose dHash and pHash are both within `threshold`.
+    When `thumbnails` is given, an item also needs `same_content` with the
+    first item of a cluster to join it.
+
+    Returns a list of clusters, each a list of indices into `hashes`.
+    """
+    half = hash_size * hash_size // 8
+    clusters = []
+    for i, value in enumerate(hashes):
+        for cluster in clusters:
+            rep = hashes[cluster[0]]
+            if (hamming_distance(value[:half], rep[:half]) <= threshold
+                    and hamming_distance(value[half:], rep[half:]) <= threshold
+                    and (thumbnails is None or same_content(thumbnails[i], thumbnails[cluster[0]]))):
+                cluster.append(i)
+                break
+        else:
+            clusters.append([i])
+    return clusters
+
+
+def pick_representatives(image_paths, threshold=DEFAULT_THRESHOLD, sharpest_only=False):
+    """
+    Clusters near-duplicate images and picks one image to process per cluster.
+
+    Images are only grouped when their hashes match and `same_content`
+    confirms it. The representative is the sharpest image when
+    `sharpest_only` is set, otherwise the first one. Returns a dict mapping
+    each representative index to the indices of the images that reuse its
+    result (including itself). Unreadable images are returned as their own
+    single-image clusters.
+    """
+    hashes, thumbnails, scores, readable = [], [], [], []
+    groups = {}
+    for i, path in enumerate(image_paths):
+        try:
+            thumb = load_thumbnail(path)
+        except ValueError:
+            groups[i] = [i]
+            continue
+        readable.append(i)
+        hashes.append(image_hash(thumb))
+        thumbnails.append(content_thumbnail(thumb))
+        scores.append(sharpness(thumb) if sharpest_only else 0.0)
+
+    for cluster in cluster_by_hash(hashes, threshold, thumbnails=thumbnails):
+        if sharpest_only:
+            rep = max(cluster, key=lambda j: scores[j])
+        else:
+            rep = cluster[0]
+        groups[readable[rep]] = [readable[j] for j in cluster]
+    return groups
@@ -7,8 +7,13 @@ from PIL import Image, ImageTk
 from deep_translator import GoogleTranslator
 from gtts import gTTS
 import os
+import sys
 import threading
 
+# The shared OCR helpers live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tiled_ocr import load_grayscale, needs_tiling, ocr_tiled
+
 # ========================================
 # CONFIGURATION
 # ========================================
@@ -229,16 +234,8 @@ class SignboardTranslator:
         }
         self.status_label.config(text=message, fg=colors.get(status_type, 'white'))
     
-    def preprocess_image(self, image_path):
+    def preprocess_image(self, gray):
         """Enhanced image preprocessing for better OCR"""
-        img = cv2.imread(image_path)
-        
-        if img is None:
-            raise ValueError("Cannot read image file")
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
         # Resize image (3x larger for better recognition)
         gray = cv2.resize(gray, None, fx=3, fy=3, interpolation=cv2.INTER_CUBIC)
         
@@ -331,15 +328,25 @@ class SignboardTranslator:
             self.translation_text.delete(1.0, tk.END)
             self.audio_btn.config(state=tk.DISABLED)
             
-            # Preprocess image
-            self.update_status("→ Preprocessing image...", 'info')
-            self.root.update()
-            processed = self.preprocess_image(file_path)
+            # Load straight to grayscale (1 byte per pixel)
+            gray = load_grayscale(file_path)
             
-            # Extract text
-            self.update_status("→ Extracting text with OCR...", 'info')
-            self.root.update()
-            extracted = self.extract_text(processed)
+            if needs_tiling(gray, 'signboard'):
+                # Upscaled whole, this photo would need several times the
+                # memory of one tile; preprocess and OCR it tile by tile
+                self.update_status("→ Large image, extracting text tile by tile...", 'info')
+                self.root.update()
+                extracted = ocr_tiled(gray, mode='signboard', config='--oem 3 --psm 3')
+            else:
+                # Preprocess image
+                self.update_status("→ Preprocessing image...", 'info')
+                self.root.update()
+                processed = self.preprocess_image(gray)
+                
+                # Extract text
+                self.update_status("→ Extracting text with OCR...", 'info')
+                self.root.update()
+                extracted = self.extract_text(processed)
             
             if not extracted or len(extracted) < 2:
                 self.original_text.insert(tk.END, "⚠️ NO TEXT DETECTED\n\n")
@@ -0,0 +1,186 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytesseract
+from gtts import gTTS
+from googletrans import Translator
+
+from image_dedup import content_thumbnail, pick_representatives
+from tiled_ocr import OCR_SLOTS, PREPROCESSORS, load_grayscale, needs_tiling, ocr_tiled
+
+# Override the Tesseract binary location with e.g. TESSERACT_CMD=C:\Program Files\Tesseract-OCR\tesseract.exe
+if os.environ.get('TESSERACT_CMD'):
+    pytesseract.pytesseract.tesseract_cmd = os.environ['TESSERACT_CMD']
+
+TARGET_LANGUAGE = 'en'
+OCR_LANGUAGES = 'eng'
+OCR_CONFIGS = {
+    'document': ['--psm 6'],
+    'signboard': [
+        '--oem 3 --psm 3',   # Fully automatic
+        '--oem 3 --psm 6',   # Single uniform block
+        '--oem 3 --psm 11',  # Sparse text
+        '--oem 3 --psm 12',  # Sparse text with OSD
+    ],
+}
+MAX_BATCH_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def perform_ocr(image_file_path: str, mode: str = 'signboard', lang: str = OCR_LANGUAGES) -> str:
+    """
+    Extracts text from an image with Tesseract.
+
+    `mode` selects the preprocessing: 'signboard' (upscale + denoise, best of
+    several page segmentation modes) or 'document' (adaptive threshold only).
+    Images whose preprocessed size would exceed the tile cap are OCR'd tile
+    by tile to keep memory bounded.
+    """
+    return ocr_grayscale(load_grayscale(image_file_path), mode=mode, lang=lang)
+
+
+def ocr_grayscale(gray, mode: str = 'signboard', lang: str = OCR_LANGUAGES) -> str:
+    """
+    Same as `perform_ocr` for an already loaded grayscale image. A config
+    Tesseract rejects is skipped; the error is only raised if all of them fail.
+    """
+    configs = OCR_CONFIGS[mode]
+    if needs_tiling(gray, mode):
+        return ocr_tiled(gray, mode=mode, lang=lang, config=configs[0])
+
+    best_text = ""
+    errors = []
+    with OCR_SLOTS:
+        processed = PREPROCESSORS[mode](gray)
+        for config in configs:
+            try:
+                text = pytesseract.image_to_string(processed, lang=lang, config=config).strip()
+            except pytesseract.TesseractError as e:
+                # e.g. --psm 12 without osd.traineddata; the other modes may still work
+                errors.append(e)
+                continue
+            if len(text) > len(best_text):
+                best_text = text
+    if len(errors) == len(configs):
+        raise errors[-1]
+    return best_text
+
+
+def translate_text(text: str, target_lang: str, source_lang: str = 'auto') -> tuple:
+    """
+    Translates text with googletrans, detecting the source language unless
+    one is given. Returns (translated_text, source_language).
+    """
+    translation = Translator().translate(text, src=source_lang, dest=target_lang)
+    return translation.text, translation.src
+
+
+def synthesize_speech(text: str, lang: str, output) -> None:
+    """Generates speech with gTTS into a file path or a binary file object."""
+    tts = gTTS(text=text, lang=lang)
+    if isinstance(output, str):
+        tts.save(output)
+    else:
+        tts.write_to_fp(output)
+
+
+def translate_and_speak(ocr_text: str, target_lang: str = TARGET_LANGUAGE, audio_path: str = None) -> dict:
+    """
+    Translates text and, if `audio_path` is given, saves the spoken translation there.
+    """
+    if not ocr_text.strip():
+        return {
+            "success": False,
+            "translated_text": "",
+            "message": "OCR text is empty for translation.",
+        }
+
+    try:
+        translated_text, source_lang = translate_text(ocr_text, target_lang)
+        if audio_path:
+            synthesize_speech(translated_text, target_lang, audio_path)
+
+        return {
+            "success": True,
+            "original_text": ocr_text,
+            "translated_text": translated_text,
+            "source_language": source_lang,
+            "target_language": target_lang,
+            "audio_file_path": audio_path,
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "translated_text": "",
+            "message": f"Translation/TTS failed: {e}",
+        }
+
+
+def analyze_image(image_file_path: str, target_lang: str = TARGET_LANGUAGE,
+                  audio_path: str = None, mode: str = 'signboard', index=None, cache_scope=None) -> dict:
+    """
+    Runs OCR, translation and TTS for one image.
+
+    When a `PerceptualHashIndex` is passed, a near-duplicate of an image seen
+    before (same `cache_scope`, target language and mode, and confirmed to
+    show the same content) reuses its stored result, including its audio
+    file, instead of being processed again. Pass a per-client `cache_scope`
+    so one client is never served another client's text.
+    """
+    try:
+        gray = load_grayscale(image_file_path)
+        image_hash = thumbnail = None
+        if index is not None:
+            image_hash = index.compute_hash(gray)
+            thumbnail = content_thumbnail(gray)
+            cached = index.find(image_hash, key=(cache_scope, target_lang, mode), thumbnail=thumbnail)
+            if cached is not None:
+                return dict(cached, duplicate=True)
+        extracted_text = ocr_grayscale(gray, mode=mode)
+    except Exception as e:
+        return {
+            "success": False,
+            "original_text": "",
+            "translated_text": "",
+            "message": f"OCR processing failed: {e}",
+        }
+
+    results = translate_and_speak(extracted_text, target_lang=target_lang, audio_path=audio_path)
+    results["original_text"] = extracted_text
+    if index is not None and results["success"]:
+        index.add(image_hash, results, key=(cache_scope, target_lang, mode), thumbnail=thumbnail)
+    return results
+
+
+def analyze_batch(jobs, target_lang: str = TARGET_LANGUAGE, mode: str = 'signboard',
+                  max_workers: int = MAX_BATCH_WORKERS, index=None, cache_scope=None,
+                  dedup: bool = False, sharpest_only: bool = False) -> list:
+    """
+    Runs `analyze_image` over many images concurrently.
+
+    `jobs` is a list of (image_path, audio_path) pairs. Results are returned
+    in the same order as `jobs`, and a failing image does not affect the
+    others. With `dedup`, near-duplicate images within the batch are
+    clustered first and only one per cluster is processed (the sharpest one
+    when `sharpest_only` is set); the rest reuse its result. It is off by
+    default because pages sharing a layout can look alike even when their
+    text differs.
+    """
+    image_paths = [image_path for image_path, _ in jobs]
+    if dedup:
+        groups = pick_representatives(image_paths, sharpest_only=sharpest_only)
+    else:
+        groups = {i: [i] for i in range(len(jobs))}
+    representatives = list(groups)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rep_results = list(executor.map(
+            lambda i: analyze_image(jobs[i][0], target_lang=target_lang, audio_path=jobs[i][1],
+                                    mode=mode, index=index, cache_scope=cache_scope),
+            representatives,
+        ))
+
+    results = [None] * len(jobs)
+    for rep, rep_result in zip(representatives, rep_results):
+        for i in groups[rep]:
+            results[i] = rep_result if i == rep else dict(rep_result, duplicate=True)
+    return results
@@ -1,21 +1,42 @@
 import pytesseract
-import cv2
-import numpy as np
 import os
 import re
+import time
+from batch_runner import JOURNAL_NAME, REPORT_NAME, Journal, file_key, run_batch, write_report
+from image_dedup import pick_representatives
+from tiled_ocr import MAX_WORKERS, load_grayscale, needs_tiling, ocr_tiled, preprocess_document_strip
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe' 
 FOLDER_PATH = r'C:\Users\kala_\OneDrive\Desktop\ocr_test'
 LANGUAGES = 'tam+eng'  
 OCR_CONFIG = r'--psm 6'  
-def preprocess_image(image_path):
-    """Loads image, converts to grayscale, and applies adaptive thresholding."""
-    img = cv2.imread(image_path)
-    if img is None:
-        print(f"Error: Could not read image at {image_path}")
-        return None
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-    return thresh
+# Near-duplicate merging is off by default: pages are compared on small
+# thumbnails, so invoices from the same template that differ only in their
+# number can still match and report the wrong one. Only enable it for folders
+# known to contain rescans of the same pages.
+DEDUP = False
+DEDUP_THRESHOLD = 4
+SHARPEST_ONLY = False  # With DEDUP: OCR only the sharpest scan among near-duplicates
+FILE_TIMEOUT = 120  # Seconds per file before the worker (and its Tesseract) is killed
+# Tesseract's own budget, well inside FILE_TIMEOUT so pytesseract normally
+# stops a hung tesseract itself before the worker has to be killed
+TESSERACT_TIMEOUT = 90
+MAX_RETRIES = 2
+WORKERS = min(4, os.cpu_count() or 1)
+# OCR_SLOTS only limits threads within one process; split the tile threads
+# between the worker processes so the whole batch stays at MAX_WORKERS jobs
+TILE_WORKERS = max(1, MAX_WORKERS // WORKERS)
+def ocr_image(gray, timeout=0):
+    """
+    Runs OCR on a grayscale image, switching to tiled mode for very large scans.
+    A non-zero `timeout` (seconds, for the whole image) makes pytesseract
+    kill Tesseract itself if it hangs.
+    """
+    if needs_tiling(gray, 'document'):
+        print(" -> Large image, using tiled OCR.")
+        return ocr_tiled(gray, mode='document', lang=LANGUAGES, config=OCR_CONFIG,
+                         max_workers=TILE_WORKERS, timeout=timeout)
+    processed_img = preprocess_document_strip(gray)
+    return pytesseract.image_to_string(processed_img, lang=LANGUAGES, config=OCR_CONFIG, timeout=timeout)
 def extract_invoice_data(text):
     """Tries to find an 8-digit sequence (common invoice number format)."""
     invoice_number_match = re.search(r'\b\d{4}-\d{5}\b', text)
@@ -23,25 +44,75 @@ def extract_invoice_data(text):
         "Invoice Number": invoice_number_match.group(0) if invoice_number_match else "Not Found"
     }
     return data
-def run_ocr_batch(folder_path):
+def process_invoice(image_path, report_stage):
+    """Worker entry point: OCRs one invoice, reporting each stage for timeouts/failures."""
+    report_stage('load')
+    gray = load_grayscale(image_path)
+    report_stage('ocr')
+    raw_text = ocr_image(gray, timeout=TESSERACT_TIMEOUT)
+    report_stage('extract')
+    extracted_data = extract_invoice_data(raw_text)
+    return {"raw_text": raw_text, "Invoice Number": extracted_data["Invoice Number"]}
+def run_ocr_batch(folder_path, dedup=DEDUP, sharpest_only=SHARPEST_ONLY, resume=True, retry_failed=False):
     print("--- Starting Enhanced OCR Process ---")
-    for filename in os.listdir(folder_path):
-        if filename.endswith(('.png', '.jpg', '.jpeg', '.tiff')):
-            image_path = os.path.join(folder_path, filename)
-            print(f"\nProcessing {filename}...")
-            processed_img = preprocess_image(image_path)
-            if processed_img is None:
+    started = time.monotonic()
+    filenames = sorted(f for f in os.listdir(folder_path) if f.endswith(('.png', '.jpg', '.jpeg', '.tiff')))
+    image_paths = [os.path.join(folder_path, f) for f in filenames]
+    keys = [file_key(p) for p in image_paths]
+
+    # Checkpoint journal: files finished by an earlier (interrupted) run are skipped
+    journal_path = os.path.join(folder_path, JOURNAL_NAME)
+    if not resume and os.path.exists(journal_path):
+        os.remove(journal_path)
+    journal = Journal(journal_path)
+    if retry_failed:
+        for key in [k for k, entry in journal.entries.items() if entry['status'] == 'failed']:
+            del journal.entries[key]
+    remaining = [i for i, key in enumerate(keys) if key not in journal]
+    if len(remaining) < len(keys):
+        print(f"Resuming: {len(keys) - len(remaining)} of {len(keys)} files already done.")
+
+    if dedup:
+        # Rescans of the same page are OCR'd once; the other copies reuse the result
+        groups = pick_representatives([image_paths[i] for i in remaining],
+                                      threshold=DEDUP_THRESHOLD, sharpest_only=sharpest_only)
+        groups = {remaining[rep]: [remaining[i] for i in members] for rep, members in groups.items()}
+    else:
+        groups = {i: [i] for i in remaining}
+    rep_by_key = {keys[rep]: rep for rep in groups}
+
+    def on_result(entry):
+        print(f"\nProcessed {entry['file']} in {entry['duration']}s ({entry['attempts']} attempt(s))")
+        if entry['status'] != 'ok':
+            print(f" -> Failed during '{entry['stage']}': {entry['error']}")
+        else:
+            result = entry['result']
+            print("--- RAW EXTRACTED TEXT (for debugging) ---")
+            print(result['raw_text'])
+            print("------------------------------------------")
+            print(f" -> Data Extraction: Invoice Number: {result['Invoice Number']}")
+        rep = rep_by_key[entry['key']]
+        for duplicate in groups[rep]:
+            if duplicate == rep:
                 continue
-            try:
-                raw_text = pytesseract.image_to_string(processed_img, lang=LANGUAGES, config=OCR_CONFIG)
-                print(" -> OCR Complete.")
-                extracted_data = extract_invoice_data(raw_text)
-                print("--- RAW EXTRACTED TEXT (for debugging) ---")
-                print(raw_text)
-                print("------------------------------------------")
-                print(f" -> Data Extraction: Invoice Number: {extracted_data['Invoice Number']}")
-            except Exception as e:
-                print(f" -> An unexpected error occurred during OCR for {filename}: {e}")
-        print("\n--- OCR Run Complete ---")
+            # Duplicates share their representative's outcome, failures included
+            record = {
+                'key': keys[duplicate], 'file': filenames[duplicate], 'duplicate_of': entry['file'],
+                'stage': entry['stage'], 'duration': 0, 'attempts': 0,
+            }
+            if entry['status'] == 'ok':
+                print(f" -> {filenames[duplicate]} is a near-duplicate, reusing result: "
+                      f"Invoice Number: {entry['result']['Invoice Number']}")
+                record.update(status='duplicate', result=entry['result'])
+            else:
+                print(f" -> {filenames[duplicate]} is a near-duplicate, marked as failed too")
+                record.update(status='failed', error=entry['error'])
+            journal.record(record)
+
+    jobs = [{'key': keys[rep], 'file': filenames[rep], 'job': image_paths[rep]} for rep in sorted(groups)]
+    run_batch(jobs, process_invoice, journal, timeout=FILE_TIMEOUT, retries=MAX_RETRIES,
+              workers=WORKERS, on_result=on_result)
+    write_report(journal, keys, os.path.join(folder_path, REPORT_NAME), time.monotonic() - started)
+    print("\n--- OCR Run Complete ---")
 if __name__ == '__main__':
     run_ocr_batch(FOLDER_PATH)
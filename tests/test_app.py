@@ -0,0 +1,82 @@
+import io
+import os
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('cv2')
+pytest.importorskip('gtts')
+pytest.importorskip('googletrans')
+
+import ocr_pipeline
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Test client with OCR, translation and TTS stubbed; an image's bytes are its 'text'."""
+    # app creates its upload folder relative to the working directory on import
+    monkeypatch.chdir(tmp_path)
+    import app as app_module
+
+    def fake_load(path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def fake_ocr(gray, mode='signboard', lang=None):
+        if gray == 'unreadable':
+            raise RuntimeError('tesseract failed')
+        return gray
+
+    uploads = tmp_path / 'uploads'
+    uploads.mkdir()
+    monkeypatch.setattr(app_module, 'TEMP_UPLOAD_FOLDER', str(uploads))
+    monkeypatch.setattr(app_module, 'RESULT_INDEX', None)
+    monkeypatch.setattr(ocr_pipeline, 'load_grayscale', fake_load)
+    monkeypatch.setattr(ocr_pipeline, 'ocr_grayscale', fake_ocr)
+    monkeypatch.setattr(ocr_pipeline, 'translate_text', lambda text, target_lang: (text.upper(), 'xx'))
+    monkeypatch.setattr(ocr_pipeline, 'synthesize_speech',
+                        lambda text, lang, output: open(output, 'wb').close())
+    return app_module.app.test_client()
+
+
+def upload(*texts):
+    return {'images': [(io.BytesIO(text.encode()), f'{text}.png') for text in texts]}
+
+
+def test_analyze_batch_returns_results_in_upload_order(client, tmp_path):
+    response = client.post('/analyze_batch', data=upload('page one', 'unreadable', 'page three'),
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['succeeded'], body['failed']) == (2, 1)
+    results = body['results']
+    assert [r['filename'] for r in results] == ['page one.png', 'unreadable.png', 'page three.png']
+    assert [r['success'] for r in results] == [True, False, True]
+    assert results[2]['translated_text'] == 'PAGE THREE'
+    # Uploads are removed once processed; only the generated audio is left
+    assert sorted(os.listdir(tmp_path / 'uploads')) == sorted(
+        r['audio_url'].rsplit('/', 1)[1] for r in results if r['success']
+    )
+
+
+def test_analyze_batch_audio_is_served_by_name(client):
+    response = client.post('/analyze_batch', data=upload('page one'), content_type='multipart/form-data')
+    audio_url = response.get_json()['results'][0]['audio_url']
+    assert client.get(audio_url).status_code == 200
+    assert client.get('/get_audio/missing.mp3').status_code == 404
+
+
+def test_analyze_batch_requires_images(client):
+    response = client.post('/analyze_batch', data={}, content_type='multipart/form-data')
+    assert response.status_code == 400
+
+
+def test_clear_stale_uploads_keeps_recent_files(client, tmp_path):
+    import app as app_module
+
+    uploads = tmp_path / 'uploads'
+    (uploads / 'in-flight.png').write_bytes(b'')
+    (uploads / 'old.mp3').write_bytes(b'')
+    os.utime(uploads / 'old.mp3', (0, 0))
+    app_module.clear_stale_uploads()
+    assert os.listdir(uploads) == ['in-flight.png']
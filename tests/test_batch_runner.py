@@ -0,0 +1,135 @@
+import json
+import os
+import subprocess
+import threading
+import time
+
+import pytest
+
+from batch_runner import Journal, Worker, run_batch
+
+
+def work(job, report_stage):
+    """Test job: behaviour is picked by the job name."""
+    report_stage('load')
+    if job == 'hang':
+        report_stage('ocr')
+        time.sleep(60)
+    if job == 'invalid':
+        raise ValueError('unreadable image')
+    if job == 'flaky':
+        raise RuntimeError('tesseract failed')
+    if job == 'crash':
+        report_stage('ocr')
+        os._exit(3)
+    if job.startswith('spawn:'):
+        # Starts a long-running child, like pytesseract starting tesseract
+        child = subprocess.Popen(['sleep', '60'])
+        with open(job[len('spawn:'):], 'w') as f:
+            f.write(str(child.pid))
+        report_stage('ocr')
+        child.wait()
+    return {'echo': job}
+
+
+def make_jobs(*names):
+    return [{'key': name, 'file': name, 'job': name} for name in names]
+
+
+@pytest.fixture
+def worker():
+    w = Worker(work)
+    yield w
+    w.close()
+
+
+def test_worker_returns_result(worker):
+    assert worker.run('a', timeout=10) == ('ok', 'load', {'echo': 'a'})
+
+
+def test_worker_timeout_reports_stage_and_recovers(worker):
+    status, stage, _ = worker.run('hang', timeout=1)
+    assert (status, stage) == ('timeout', 'ocr')
+    assert worker.run('b', timeout=10)[0] == 'ok'
+
+
+def test_worker_crash_reports_last_stage_and_recovers(worker):
+    status, stage, payload = worker.run('crash', timeout=10)
+    assert (status, stage) == ('crashed', 'ocr')
+    assert 'code 3' in payload
+    assert worker.run('b', timeout=10)[0] == 'ok'
+
+
+def test_worker_separates_permanent_and_retryable_errors(worker):
+    assert worker.run('invalid', timeout=10)[0] == 'invalid'
+    assert worker.run('flaky', timeout=10)[0] == 'error'
+
+
+def is_running(pid):
+    """True unless the process is gone or a zombie waiting to be reaped."""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            state = f.read().rsplit(')', 1)[1].split()[0]
+    except FileNotFoundError:
+        return False
+    return state != 'Z'
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/stat'), reason="inspects /proc")
+def test_worker_timeout_kills_child_processes(worker, tmp_path):
+    pid_file = tmp_path / 'child.pid'
+    assert worker.run(f'spawn:{pid_file}', timeout=1)[0] == 'timeout'
+    child_pid = int(pid_file.read_text())
+    time.sleep(0.2)
+    assert not is_running(child_pid)
+
+
+def test_worker_stops_when_interrupted(worker):
+    stop = threading.Event()
+    threading.Timer(0.3, stop.set).start()
+    started = time.monotonic()
+    assert worker.run('hang', timeout=30, stop=stop)[0] == 'interrupted'
+    assert time.monotonic() - started < 5
+
+
+def test_run_batch_retries_only_retryable_failures(tmp_path):
+    journal = Journal(str(tmp_path / 'journal.jsonl'))
+    run_batch(make_jobs('a', 'invalid', 'flaky'), work, journal, timeout=10, retries=2)
+    assert journal.entries['a']['status'] == 'ok'
+    assert journal.entries['invalid']['attempts'] == 1
+    assert journal.entries['flaky']['attempts'] == 3
+    assert journal.entries['flaky']['error'].startswith('error: RuntimeError')
+
+
+def test_run_batch_interrupt_cancels_remaining_jobs(tmp_path):
+    journal = Journal(str(tmp_path / 'journal.jsonl'))
+
+    def interrupt(entry):
+        raise KeyboardInterrupt
+
+    started = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        run_batch(make_jobs('a', 'hang', 'hang2', 'hang3'), work, journal,
+                  timeout=30, workers=1, on_result=interrupt)
+    assert time.monotonic() - started < 10
+    assert list(journal.entries) == ['a']
+
+
+def test_journal_ignores_truncated_last_line(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    path.write_text(json.dumps({'key': 'a', 'status': 'ok'}) + '\n{"key": "b", "sta')
+    journal = Journal(str(path))
+    assert 'a' in journal
+    assert 'b' not in journal
+    # Entries recorded after the crash must not be glued onto the broken line
+    journal.record({'key': 'c', 'status': 'ok'})
+    assert set(Journal(str(path)).entries) == {'a', 'c'}
+
+
+def test_run_batch_resumes_from_journal(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    Journal(path).record({'key': 'crash', 'file': 'crash', 'status': 'ok'})
+    seen = []
+    run_batch(make_jobs('crash', 'a'), work, Journal(path), timeout=10, on_result=seen.append)
+    assert [entry['key'] for entry in seen] == ['a']
+    assert set(Journal(path).entries) == {'crash', 'a'}
@@ -0,0 +1,141 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+import image_dedup
+from image_dedup import (
+    PerceptualHashIndex, cluster_by_hash, content_thumbnail, hamming_distance, image_hash, load_thumbnail,
+)
+
+
+def make_hash(flipped_bits=(), phash_flipped_bits=()):
+    """A 128-bit dHash+pHash value: all zeros except the given bit positions."""
+    bits = np.zeros(128, dtype=np.uint8)
+    for i in flipped_bits:
+        bits[i] = 1
+    for i in phash_flipped_bits:
+        bits[64 + i] = 1
+    return np.packbits(bits)
+
+
+def test_hamming_distance_counts_differing_bits():
+    assert hamming_distance(make_hash(), make_hash([1, 5, 9])) == 3
+
+
+def test_cluster_by_hash_groups_within_threshold():
+    hashes = [
+        make_hash(),
+        make_hash(range(20)),          # far from the first
+        make_hash([0, 1]),             # near the first
+        make_hash(list(range(20)) + [30]),  # near the second
+    ]
+    assert cluster_by_hash(hashes, threshold=4) == [[0, 2], [1, 3]]
+
+
+def test_cluster_by_hash_requires_both_hashes_to_match():
+    hashes = [make_hash(), make_hash(phash_flipped_bits=range(10))]
+    assert cluster_by_hash(hashes, threshold=4) == [[0], [1]]
+
+
+def test_index_finds_near_duplicates_only_under_the_same_key():
+    index = PerceptualHashIndex(threshold=4)
+    index.add(make_hash(), {'text': 'a'}, key=('client-1', 'en'))
+    assert index.find(make_hash([3]), key=('client-1', 'en')) == {'text': 'a'}
+    assert index.find(make_hash([3]), key=('client-2', 'en')) is None
+    assert index.find(make_hash(range(10)), key=('client-1', 'en')) is None
+
+
+def test_index_returns_closest_match():
+    index = PerceptualHashIndex(threshold=4)
+    index.add(make_hash([0, 1, 2]), 'far')
+    index.add(make_hash([0]), 'near')
+    assert index.find(make_hash()) == 'near'
+
+
+def test_index_evicts_oldest_and_reports_it():
+    evicted = []
+    index = PerceptualHashIndex(threshold=0, max_entries=2, on_evict=evicted.append)
+    for i in range(3):
+        index.add(make_hash(range(i * 10)), f'result-{i}')
+    assert evicted == ['result-0']
+    assert len(index) == 2
+    assert index.find(make_hash()) is None
+
+
+def test_pick_representatives_prefers_sharpest(monkeypatch):
+    thumbs = {'a.png': ('h0', 1.0), 'b.png': ('h0', 9.0), 'c.png': ('h1', 5.0)}
+    hashes = {'h0': make_hash(), 'h1': make_hash(range(30))}
+
+    def fake_load(path):
+        if path == 'broken.png':
+            raise ValueError(path)
+        return path
+
+    monkeypatch.setattr(image_dedup, 'load_thumbnail', fake_load)
+    monkeypatch.setattr(image_dedup, 'image_hash', lambda thumb: hashes[thumbs[thumb][0]])
+    monkeypatch.setattr(image_dedup, 'sharpness', lambda thumb: thumbs[thumb][1])
+    monkeypatch.setattr(image_dedup, 'content_thumbnail', lambda thumb: thumb)
+    monkeypatch.setattr(image_dedup, 'same_content', lambda a, b: True)
+
+    paths = ['a.png', 'broken.png', 'b.png', 'c.png']
+    assert image_dedup.pick_representatives(paths, sharpest_only=True) == {1: [1], 2: [0, 2], 3: [3]}
+    assert image_dedup.pick_representatives(paths) == {1: [1], 0: [0, 2], 3: [3]}
+
+
+def render_invoice(path, number, seed, rescan=False):
+    """Draws an invoice from a fixed template; `seed` picks the line items."""
+    import random
+    import cv2
+
+    rng = random.Random(seed)
+    page = np.full((1754, 1240), 255, np.uint8)
+    cv2.rectangle(page, (60, 60), (1180, 220), 0, 3)
+    cv2.putText(page, 'ACME TRADING CO.        INVOICE', (90, 150), cv2.FONT_HERSHEY_SIMPLEX, 2, 0, 5)
+    cv2.putText(page, f'Invoice No: {number}', (90, 300), cv2.FONT_HERSHEY_SIMPLEX, 1.1, 0, 2)
+    for row in range(12):
+        y = 420 + row * 70
+        cv2.line(page, (60, y), (1180, y), 0, 1)
+        item = ' '.join(rng.choice(['Widget', 'Bolt', 'Cable', 'Pipe', 'Valve', 'Gear']) for _ in range(3))
+        cv2.putText(page, item, (90, y + 50), cv2.FONT_HERSHEY_SIMPLEX, 1, 0, 2)
+        cv2.putText(page, f'{rng.randint(1, 99)} x {rng.randint(10, 999)}.00', (840, y + 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, 0, 2)
+    if rescan:
+        # Darker, noisy, slightly blurred and shifted, saved as a lossy JPEG
+        noise = np.random.default_rng(seed).normal(0, 8, page.shape)
+        scan = cv2.GaussianBlur(page * 0.85 + 20 + noise, (3, 3), 0.8)
+        shift = np.float32([[1, 0, 3], [0, 1, -2]])
+        page = np.clip(cv2.warpAffine(scan, shift, (1240, 1754), borderValue=235), 0, 255).astype(np.uint8)
+    cv2.imwrite(str(path), page, [cv2.IMWRITE_JPEG_QUALITY, 70])
+
+
+@pytest.fixture
+def invoices(tmp_path):
+    """Six different invoices from one template, then a rescan of the first."""
+    paths = []
+    for i in range(6):
+        paths.append(tmp_path / f'invoice-{i}.png')
+        render_invoice(paths[-1], f'{1000 + i * 7}-{20000 + i * 311}', seed=i)
+    paths.append(tmp_path / 'invoice-0-rescan.jpg')
+    render_invoice(paths[-1], '1000-20000', seed=0, rescan=True)
+    return [str(p) for p in paths]
+
+
+def test_hashes_alone_merge_invoices_sharing_a_template(invoices):
+    hashes = [image_hash(load_thumbnail(p)) for p in invoices[:6]]
+    assert cluster_by_hash(hashes) == [list(range(6))]
+
+
+def test_pick_representatives_keeps_different_invoices_apart(invoices):
+    groups = image_dedup.pick_representatives(invoices)
+    assert groups == {0: [0, 6], 1: [1], 2: [2], 3: [3], 4: [4], 5: [5]}
+
+
+def test_index_confirms_matches_on_content(invoices):
+    thumbs = [load_thumbnail(p) for p in invoices]
+    index = PerceptualHashIndex(threshold=4)
+    index.add(image_hash(thumbs[0]), 'invoice-0', thumbnail=content_thumbnail(thumbs[0]))
+    for other in thumbs[1:6]:
+        assert index.find(image_hash(other), thumbnail=content_thumbnail(other)) is None
+    rescan = thumbs[6]
+    assert index.find(image_hash(rescan), thumbnail=content_thumbnail(rescan)) == 'invoice-0'
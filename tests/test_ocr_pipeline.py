@@ -0,0 +1,91 @@
+import random
+import time
+
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('gtts')
+pytest.importorskip('googletrans')
+
+import ocr_pipeline
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Stubs OCR, translation and TTS; an image 'path' is OCR'd as 'text of <path>'."""
+    ocr_calls = []
+
+    def fake_ocr(gray, mode='signboard', lang=None):
+        ocr_calls.append(gray)
+        # Finish out of order, so results only line up if analyze_batch reorders them
+        time.sleep(random.uniform(0, 0.05))
+        if 'bad' in gray:
+            raise RuntimeError('tesseract failed')
+        return f'text of {gray}'
+
+    monkeypatch.setattr(ocr_pipeline, 'load_grayscale', lambda path: path)
+    monkeypatch.setattr(ocr_pipeline, 'ocr_grayscale', fake_ocr)
+    monkeypatch.setattr(ocr_pipeline, 'translate_text', lambda text, target_lang: (text.upper(), 'xx'))
+    monkeypatch.setattr(ocr_pipeline, 'synthesize_speech', lambda text, lang, output: None)
+    monkeypatch.setattr(ocr_pipeline, 'pick_representatives',
+                        lambda paths, sharpest_only=False: {i: [i] for i in range(len(paths))})
+    return ocr_calls
+
+
+def test_analyze_batch_keeps_job_order(pipeline):
+    jobs = [(f'page-{i}', f'page-{i}.mp3') for i in range(8)]
+    results = ocr_pipeline.analyze_batch(jobs, max_workers=4)
+    assert [r['original_text'] for r in results] == [f'text of page-{i}' for i in range(8)]
+    assert [r['audio_file_path'] for r in results] == [audio for _, audio in jobs]
+    assert results[0]['source_language'] == 'xx'
+
+
+def test_analyze_batch_isolates_failures(pipeline):
+    jobs = [('page-0', 'a.mp3'), ('bad-page', 'b.mp3'), ('page-2', 'c.mp3')]
+    results = ocr_pipeline.analyze_batch(jobs)
+    assert [r['success'] for r in results] == [True, False, True]
+    assert 'tesseract failed' in results[1]['message']
+    assert results[2]['translated_text'] == 'TEXT OF PAGE-2'
+
+
+def test_analyze_batch_fans_out_duplicate_results(pipeline, monkeypatch):
+    monkeypatch.setattr(ocr_pipeline, 'pick_representatives',
+                        lambda paths, sharpest_only=False: {0: [0, 2], 1: [1]})
+    jobs = [('page-0', 'a.mp3'), ('page-1', 'b.mp3'), ('page-0-rescan', 'c.mp3')]
+    results = ocr_pipeline.analyze_batch(jobs, dedup=True)
+    assert sorted(pipeline) == ['page-0', 'page-1']
+    assert results[2]['original_text'] == 'text of page-0'
+    assert results[2]['duplicate'] is True
+    assert not results[0].get('duplicate')
+
+
+def test_analyze_batch_processes_every_image_unless_dedup_is_requested(pipeline, monkeypatch):
+    monkeypatch.setattr(ocr_pipeline, 'pick_representatives',
+                        lambda paths, sharpest_only=False: {0: [0, 1]})
+    results = ocr_pipeline.analyze_batch([('page-0', 'a.mp3'), ('page-1', 'b.mp3')])
+    assert sorted(pipeline) == ['page-0', 'page-1']
+    assert not any(r.get('duplicate') for r in results)
+
+
+def test_ocr_grayscale_skips_configs_tesseract_rejects(monkeypatch):
+    np = pytest.importorskip('numpy')
+
+    def fake_image_to_string(image, lang, config):
+        if '--psm 12' in config:
+            raise ocr_pipeline.pytesseract.TesseractError(1, 'osd.traineddata not found')
+        return 'longest text' if '--psm 11' in config else 'text'
+
+    monkeypatch.setattr(ocr_pipeline.pytesseract, 'image_to_string', fake_image_to_string)
+    gray = np.full((40, 40), 255, dtype=np.uint8)
+    assert ocr_pipeline.ocr_grayscale(gray, mode='signboard') == 'longest text'
+
+
+def test_ocr_grayscale_raises_when_every_config_fails(monkeypatch):
+    np = pytest.importorskip('numpy')
+
+    def fake_image_to_string(image, lang, config):
+        raise ocr_pipeline.pytesseract.TesseractError(1, 'failed')
+
+    monkeypatch.setattr(ocr_pipeline.pytesseract, 'image_to_string', fake_image_to_string)
+    with pytest.raises(ocr_pipeline.pytesseract.TesseractError):
+        ocr_pipeline.ocr_grayscale(np.full((40, 40), 255, dtype=np.uint8), mode='signboard')
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('pytesseract')
+
+import ocr_script
+from batch_runner import REPORT_NAME
+
+
+def test_duplicates_of_a_failed_file_are_reported_as_failed(tmp_path, monkeypatch):
+    for name in ('a.png', 'b.png', 'c.png'):
+        (tmp_path / name).write_bytes(b'')
+
+    def fake_run_batch(jobs, func, journal, on_result, **kwargs):
+        for job in jobs:
+            entry = {'key': job['key'], 'file': job['file'], 'duration': 1.0, 'attempts': 3, 'stage': 'ocr'}
+            if job['file'] == 'a.png':
+                entry.update(status='failed', error='timeout: Timed out after 120s')
+            else:
+                entry.update(status='ok', result={'raw_text': '', 'Invoice Number': 'Not Found'})
+            journal.record(entry)
+            on_result(entry)
+
+    monkeypatch.setattr(ocr_script, 'pick_representatives',
+                        lambda paths, threshold, sharpest_only: {0: [0, 2], 1: [1]})
+    monkeypatch.setattr(ocr_script, 'run_batch', fake_run_batch)
+    ocr_script.run_ocr_batch(str(tmp_path), dedup=True)
+
+    report = json.loads((tmp_path / REPORT_NAME).read_text())
+    assert (report['succeeded'], report['failed'], report['not_processed']) == (1, 2, 0)
+    duplicate = next(f for f in report['failures'] if f['file'] == 'c.png')
+    assert duplicate['duplicate_of'] == 'a.png'
+    assert (duplicate['stage'], duplicate['error']) == ('ocr', 'timeout: Timed out after 120s')
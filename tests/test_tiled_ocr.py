@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+pytest.importorskip('pytesseract')
+
+from tiled_ocr import (
+    MAX_TILE_PIXELS, PREPROCESS_SCALE, axis_spans, needs_tiling, stitch_words, tile_bounds, tile_size,
+)
+
+
+def word(text, x, y, height=20):
+    return {'text': text, 'x': x, 'y': y, 'height': height}
+
+
+def test_axis_spans_owned_regions_partition_the_axis():
+    spans = axis_spans(3000, 1024, 128)
+    assert spans[0][2] == 0
+    assert spans[-1][3] == 3000
+    for (_, _, _, keep_end), (_, _, keep_start, _) in zip(spans, spans[1:]):
+        assert keep_end == keep_start
+    for start, end, keep_start, keep_end in spans:
+        assert end - start <= 1024
+        assert start <= keep_start < keep_end <= end
+
+
+def test_axis_spans_owned_text_lies_inside_its_span():
+    overlap = 128
+    spans = axis_spans(3000, 1024, overlap)
+    for centre in range(0, 3000, 7):
+        owner = [s for s in spans if s[2] <= centre < s[3]]
+        assert len(owner) == 1
+        start, end, _, _ = owner[0]
+        # Text up to `overlap` tall is fully visible in the owning span
+        top, bottom = centre - overlap / 2, centre + overlap / 2
+        assert max(top, 0) >= start and min(bottom, 3000) <= end
+
+
+def test_axis_spans_single_span_for_short_axis():
+    assert axis_spans(500, 1024, 128) == [(0, 500, 0, 500)]
+
+
+def test_axis_spans_rejects_overlap_larger_than_tile():
+    with pytest.raises(ValueError):
+        axis_spans(3000, 128, 128)
+
+
+def test_tiles_are_capped_by_preprocessed_pixels_not_image_width():
+    size = tile_size('signboard')
+    processed_side = size * PREPROCESS_SCALE['signboard']
+    assert processed_side * processed_side <= MAX_TILE_PIXELS
+    # A wide 48MP photo is split across its width as well as its height
+    tiles = tile_bounds(6000, 8000, size)
+    for (top, bottom, _, _), (left, right, _, _) in tiles:
+        assert (bottom - top) * (right - left) * PREPROCESS_SCALE['signboard'] ** 2 <= MAX_TILE_PIXELS
+    assert len({cols for _, cols in tiles}) > 1
+
+
+def test_needs_tiling_accounts_for_preprocess_upscaling():
+    import numpy as np
+
+    photo = np.empty((3000, 4000), dtype=np.uint8)  # 12MP, 108MP once upscaled 3x
+    assert not needs_tiling(photo, 'document')
+    assert needs_tiling(photo, 'signboard')
+    assert not needs_tiling(np.empty((1000, 1000), dtype=np.uint8), 'signboard')
+
+
+def test_stitch_words_orders_lines_and_words():
+    words = [word('world', 300, 101), word('second', 100, 200), word('hello', 100, 99)]
+    assert stitch_words(words) == 'hello world\nsecond'
+
+
+def test_stitch_words_drops_overlap_duplicates_but_keeps_repeated_words():
+    words = [word('total', 100, 50), word('total', 104, 52), word('total', 600, 50)]
+    assert stitch_words(words) == 'total total'
+
+
+def test_ocr_tiled_splits_timeout_budget_across_tiles(monkeypatch):
+    import numpy as np
+    import tiled_ocr
+
+    timeouts = []
+
+    def fake_image_to_data(image, lang, config, timeout, output_type):
+        timeouts.append(timeout)
+        time.sleep(0.2)
+        return {'text': [], 'top': [], 'left': [], 'height': [], 'width': []}
+
+    monkeypatch.setattr(tiled_ocr.pytesseract, 'image_to_data', fake_image_to_data)
+    gray = np.zeros((2000, 2000), dtype=np.uint8)
+    # Tiles are processed one at a time, so the 0.5s budget runs out after a few
+    with pytest.raises(RuntimeError, match='timeout'):
+        tiled_ocr.ocr_tiled(gray, max_tile_pixels=800 * 800, max_workers=1, timeout=0.5)
+    assert 0 < len(timeouts) < 9
+    assert all(0 < t <= 0.5 for t in timeouts)
+    assert timeouts == sorted(timeouts, reverse=True)
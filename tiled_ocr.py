@@ -0,0 +1,196 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+import cv2
+import numpy as np
+import pytesseract
+
+MAX_TILE_PIXELS = 12_000_000  # Cap on a tile's size *after* preprocessing (upscaling included)
+TILE_OVERLAP = 128  # Source rows shared by vertically neighbouring tiles; the tallest text handled
+TILE_OVERLAP_X = 2 * TILE_OVERLAP  # Source columns shared horizontally; the widest word handled
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+# Process-wide cap on concurrent preprocess + Tesseract jobs. Shared by every
+# caller (tiles, whole images, concurrent requests), so nested thread pools
+# only add waiting threads, not extra working memory.
+OCR_SLOTS = threading.BoundedSemaphore(MAX_WORKERS)
+LINE_MERGE_FRACTION = 0.5  # Words whose centres are this many line heights apart share a line
+DEDUP_WORD_DISTANCE = 0.5  # Identical words closer than this many heights are one word
+
+
+def preprocess_document_strip(gray):
+    """Adaptive thresholding for scanned documents (same as ocr_script)."""
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+
+
+def preprocess_signboard_strip(gray):
+    """3x upscale, denoise, threshold and clean up (same as the signboard translator)."""
+    gray = cv2.resize(gray, None, fx=3, fy=3, interpolation=cv2.INTER_CUBIC)
+    denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+    binary = cv2.adaptiveThreshold(denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    kernel = np.ones((2, 2), np.uint8)
+    cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+    return cv2.morphologyEx(cleaned, cv2.MORPH_OPEN, kernel)
+
+
+PREPROCESSORS = {
+    'document': preprocess_document_strip,
+    'signboard': preprocess_signboard_strip,
+}
+# How much each preprocessor enlarges its input, per side
+PREPROCESS_SCALE = {
+    'document': 1,
+    'signboard': 3,
+}
+
+
+def load_grayscale(image_path):
+    """Loads an image straight to single-channel grayscale (1 byte per pixel)."""
+    gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError(f"Cannot read image file: {image_path}")
+    return gray
+
+
+def needs_tiling(gray, mode='document', max_tile_pixels=MAX_TILE_PIXELS):
+    """True when the preprocessed (e.g. 3x upscaled) image would exceed the tile cap."""
+    return gray.shape[0] * gray.shape[1] * PREPROCESS_SCALE[mode] ** 2 > max_tile_pixels
+
+
+def tile_size(mode, max_tile_pixels=MAX_TILE_PIXELS):
+    """Side length (source pixels) of a square tile whose preprocessed size fits `max_tile_pixels`."""
+    return int(math.sqrt(max_tile_pixels) / PREPROCESS_SCALE[mode])
+
+
+def axis_spans(length, size, overlap):
+    """
+    Splits `length` pixels along one axis into overlapping spans.
+
+    Returns a list of (start, end, keep_start, keep_end) tuples. Each span
+    only "owns" the pixels between keep_start and keep_end; the boundary
+    between two neighbours sits in the middle of their overlap, so anything
+    no larger than `overlap` whose centre a span owns lies completely inside
+    that span.
+    """
+    if size <= overlap:
+        raise ValueError("tile size must be larger than overlap")
+    step = size - overlap
+    bounds = []
+    start = 0
+    while True:
+        end = min(start + size, length)
+        bounds.append((start, end))
+        if end >= length:
+            break
+        start += step
+
+    spans = []
+    for i, (start, end) in enumerate(bounds):
+        keep_start = 0 if i == 0 else start + overlap // 2
+        keep_end = length if i == len(bounds) - 1 else end - overlap // 2
+        spans.append((start, end, keep_start, keep_end))
+    return spans
+
+
+def tile_bounds(height, width, size, overlap=TILE_OVERLAP, overlap_x=TILE_OVERLAP_X):
+    """Splits an image into overlapping square-ish tiles: a list of (row_span, col_span) pairs."""
+    rows = axis_spans(height, size, overlap)
+    cols = axis_spans(width, max(size, overlap_x + 1), overlap_x)
+    return list(product(rows, cols))
+
+
+def _ocr_tile(gray, tile, preprocess, lang, config, deadline):
+    """Preprocesses and OCRs one tile, returning the words it owns in source coordinates."""
+    (top, bottom, keep_top, keep_bottom), (left, right, keep_left, keep_right) = tile
+    source = gray[top:bottom, left:right]
+    with OCR_SLOTS:
+        timeout = 0
+        if deadline is not None:
+            # Each tile gets whatever is left of the image's overall budget
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                raise RuntimeError('Tesseract process timeout')
+        processed = preprocess(source)
+        scale = processed.shape[0] / source.shape[0]
+        data = pytesseract.image_to_data(
+            processed, lang=lang, config=config, timeout=timeout,
+            output_type=pytesseract.Output.DICT,
+        )
+        # Free the tile before giving up the slot, so it never overlaps the next one
+        del processed
+
+    words = []
+    for i, text in enumerate(data['text']):
+        if not text.strip():
+            continue
+        height = data['height'][i] / scale
+        width = data['width'][i] / scale
+        y = top + data['top'][i] / scale + height / 2
+        x = left + data['left'][i] / scale + width / 2
+        # Words in an overlap are also seen by the neighbour; keep only owned ones
+        if not (keep_top <= y < keep_bottom and keep_left <= x < keep_right):
+            continue
+        words.append({'text': text, 'x': x, 'y': y, 'height': height})
+    return words
+
+
+def stitch_words(words):
+    """
+    Groups words from all tiles into lines by vertical position, orders each
+    line left to right and drops identical words left over from overlaps.
+    """
+    lines = []
+    for word in sorted(words, key=lambda w: w['y']):
+        if lines:
+            line = lines[-1]
+            if abs(word['y'] - line['y']) <= LINE_MERGE_FRACTION * max(line['height'], word['height']):
+                line['words'].append(word)
+                line['y'] = sum(w['y'] for w in line['words']) / len(line['words'])
+                continue
+        lines.append({'y': word['y'], 'height': word['height'], 'words': [word]})
+
+    text_lines = []
+    for line in lines:
+        kept = []
+        for word in sorted(line['words'], key=lambda w: w['x']):
+            if (kept and kept[-1]['text'] == word['text']
+                    and abs(kept[-1]['x'] - word['x']) <= DEDUP_WORD_DISTANCE * word['height']):
+                continue
+            kept.append(word)
+        text_lines.append(' '.join(w['text'] for w in kept))
+    return '\n'.join(text_lines)
+
+
+def ocr_tiled(gray, mode='document', lang='eng', config='--psm 6',
+              max_tile_pixels=MAX_TILE_PIXELS, overlap=TILE_OVERLAP, overlap_x=TILE_OVERLAP_X,
+              max_workers=MAX_WORKERS, timeout=0):
+    """
+    Runs OCR on a grayscale image tile by tile.
+
+    Tiles are numpy views into `gray`, so nothing is copied up front, and
+    each is sized so that its preprocessed (for signboards, 3x upscaled)
+    version stays under `max_tile_pixels`. Working memory therefore depends
+    on the tile cap and OCR_SLOTS, not on the image's width or height.
+    Text taller than `overlap` or words wider than `overlap_x` (source
+    pixels) may be cut at tile edges; raise them for very large lettering.
+    `timeout` (seconds, 0 for none) is the budget for the whole image: each
+    tile's Tesseract call gets only what is left of it.
+    """
+    preprocess = PREPROCESSORS[mode]
+    deadline = time.monotonic() + timeout if timeout else None
+    size = max(tile_size(mode, max_tile_pixels), overlap + 1)
+    tiles = tile_bounds(gray.shape[0], gray.shape[1], size, overlap, overlap_x)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        per_tile = executor.map(
+            lambda tile: _ocr_tile(gray, tile, preprocess, lang, config, deadline), tiles
+        )
+        words = [word for tile_words in per_tile for word in tile_words]
+    return stitch_words(words)
+
+
+def ocr_image_tiled(image_path, mode='document', lang='eng', config='--psm 6', **kwargs):
+    """Loads an image from disk and runs tiled OCR on it."""
+    return ocr_tiled(load_grayscale(image_path), mode=mode, lang=lang, config=config, **kwargs)
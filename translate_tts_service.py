@@ -1,8 +1,7 @@
 
 
 import os
-from googletrans import Translator
-from gtts import gTTS
+from ocr_pipeline import translate_and_speak as run_translate_and_speak
 
 TARGET_LANGUAGE = 'en'
 
@@ -12,6 +11,9 @@ def translate_and_speak(ocr_text: str, target_lang: str = TARGET_LANGUAGE) -> di
     """
     Takes OCR text, translates it, generates speech audio, and returns the results.
 
+    Thin wrapper around ocr_pipeline.translate_and_speak that writes the audio
+    to OUTPUT_AUDIO_FILE in the current directory.
+
     Args:
         ocr_text (str): The text extracted by Tesseract/OpenCV.
         target_lang (str): The language code to translate the text into (e.g., 'en', 'fr').
@@ -19,47 +21,7 @@ def translate_and_speak(ocr_text: str, target_lang: str = TARGET_LANGUAGE) -> di
     Returns:
         dict: A dictionary containing the original, translated text, and audio file path.
     """
-    if not ocr_text.strip():
-        return {
-            "success": False,
-            "message": "OCR text is empty.",
-        }
-
-    print(f"1. Original Text Received: \"{ocr_text[:50]}...\"")
-
-    try:
-        translator = Translator()
-    
-        translation = translator.translate(ocr_text, dest=target_lang)
-        translated_text = translation.text
-        source_lang = translation.src
-        print(f"2. Translated Text ({source_lang} -> {target_lang}): \"{translated_text[:50]}...\"")
-
-    except Exception as e:
-        return {
-            "success": False,
-            "message": f"Translation failed: {e}",
-        }
-
-    try:
-        tts = gTTS(text=translated_text, lang=target_lang)
-        tts.save(OUTPUT_AUDIO_FILE)
-        print(f"3. Audio file saved to: {OUTPUT_AUDIO_FILE}")
-
-    except Exception as e:
-        return {
-            "success": False,
-            "message": f"TTS generation failed: {e}",
-        }
-
-    return {
-        "success": True,
-        "original_text": ocr_text,
-        "translated_text": translated_text,
-        "source_language": source_lang,
-        "target_language": target_lang,
-        "audio_file_path": os.path.abspath(OUTPUT_AUDIO_FILE)
-    }
+    return run_translate_and_speak(ocr_text, target_lang, audio_path=os.path.abspath(OUTPUT_AUDIO_FILE))
 
 if __name__ == "__main__":
     sample_ocr_output = "Das ist ein Beispieltext, der von einer deutschen Seite gescannt wurde."